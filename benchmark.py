@@ -0,0 +1,148 @@
+"""
+Benchmark suite for the reliable transport.
+
+record (default): run every file at every loss rate with tracing enabled and
+                  store the packet-event trace under traces/
+--replay:         rerun against the recorded traces, so a modified MyClient
+                  sees the same loss decisions for the same transmissions
+--update:         store the results as the new baselines; runs whose received
+                  file does not match are never stored
+
+Each run reports time, bytes, retransmission ratio and goodput and is
+compared against baselines.json; any regression makes the script exit 1.
+"""
+
+import argparse
+import json
+import os
+import re
+import shutil
+import subprocess
+import sys
+from pathlib import Path
+
+from tracing import load_trace, summarize
+
+ROOT = Path(__file__).resolve().parent
+BASELINE_PATH = ROOT / "baselines.json"
+INPUT_PATH = ROOT / "sendfiles"
+OUTPUT_PATH = ROOT / "recvfiles"
+TRACE_PATH = ROOT / "traces"
+RESULTS_PATH = TRACE_PATH / "results.json"
+LOG_PATH = ROOT / "logs"
+NETWORK_PY = ROOT / "network.py"
+JSON_FILE = ROOT / "01.json"
+
+TIME_PATTERN = r"Total time of transfer\s*=\s*([\d.]+)"
+SUCCESS_PATTERN = "SUCCESS"
+TIMEOUT_FACTOR = 4          # a run is killed after this many times its baseline time
+DEFAULT_TIMEOUT = 600       # nominal seconds allowed for a run without a baseline
+STARTUP_TIMEOUT = 30        # real seconds for interpreter startup and the final file check
+
+
+def trace_file(input_filename: str, error_rate: int, replay: bool) -> Path:
+    suffix = ".replay.trace" if replay else ".trace"
+    return TRACE_PATH / f"{input_filename.replace('.txt', '')}-{error_rate}{suffix}"
+
+
+def run_timeout(baseline: dict, timeout: float, time_scale: float) -> float:
+    """Real seconds a run may take before it is killed"""
+    nominal = timeout if timeout is not None else TIMEOUT_FACTOR * baseline.get("time", DEFAULT_TIMEOUT / TIMEOUT_FACTOR)
+    return nominal * (time_scale or 1) + STARTUP_TIMEOUT
+
+
+def run_individual_file(input_filename: str, error_rate: int, replay: bool, seed: int, time_scale: float,
+                        timeout: float) -> dict:
+    output_filepath: Path = OUTPUT_PATH / f"{error_rate}" / input_filename.replace(".txt", "")
+    output_filepath.mkdir(parents=True, exist_ok=True)
+    command = [sys.executable, str(NETWORK_PY), str(JSON_FILE),
+               str(INPUT_PATH / input_filename), str(output_filepath / input_filename), str(error_rate),
+               "--trace", str(trace_file(input_filename, error_rate, replay)), "--seed", str(seed)]
+    if time_scale is not None:
+        command += ["--timescale", str(time_scale)]
+    if replay:
+        command += ["--replay", str(trace_file(input_filename, error_rate, False))]
+    result = subprocess.run(command, capture_output=True, text=True, check=True, cwd=ROOT, timeout=timeout)
+    shutil.copytree(LOG_PATH, output_filepath, dirs_exist_ok=True)
+
+    metrics = summarize(load_trace(trace_file(input_filename, error_rate, replay)))
+    metrics["time"] = float(re.search(TIME_PATTERN, result.stdout).group(1))
+    metrics["correct"] = SUCCESS_PATTERN in result.stdout
+    return metrics
+
+
+def find_regressions(result: dict, baseline: dict, tolerance: float) -> list[str]:
+    """Compare one run against its baseline; lower is better except for goodput"""
+    regressions = []
+    if not result["correct"]:
+        regressions.append("received file does not match")
+    for metric in ("time", "bytes", "retransmissionRatio"):
+        if metric in baseline and result[metric] > baseline[metric] * tolerance:
+            regressions.append(f"{metric} {result[metric]} > {round(baseline[metric] * tolerance, 4)}")
+    if "goodput" in baseline and result["goodput"] < baseline["goodput"] / tolerance:
+        regressions.append(f"goodput {result['goodput']} < {round(baseline['goodput'] / tolerance, 3)}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Record, replay and compare transport benchmarks")
+    parser.add_argument("--files", nargs="*", help="input files to run (default: all files in baselines.json)")
+    parser.add_argument("--loss", nargs="*", type=int, help="loss rates to run (default: all rates in baselines.json)")
+    parser.add_argument("--replay", action="store_true", help="replay the loss decisions of previously recorded traces")
+    parser.add_argument("--update", action="store_true", help="store the results as the new baselines")
+    parser.add_argument("--tolerance", type=float, default=1.25, help="allowed ratio over the baseline")
+    parser.add_argument("--seed", type=int, default=0, help="seed for loss decisions not covered by a trace")
+    parser.add_argument("--timescale", type=float, help="run the simulation this factor faster than real time, e.g. 0.1")
+    parser.add_argument("--timeout", type=float,
+                        help=f"simulated seconds allowed per run (default: {TIMEOUT_FACTOR}x its baseline time)")
+    args = parser.parse_args()
+
+    with open(BASELINE_PATH) as f:
+        baselines: dict = json.load(f)
+    files = args.files or list(baselines.keys())
+    TRACE_PATH.mkdir(exist_ok=True)
+
+    results: dict = {}
+    failed = False
+    print(f"{'file':<12}{'loss':>6}{'time':>11}{'bytes':>11}{'retx':>8}{'goodput':>11}  status")
+    for input_filename in files:
+        rates = args.loss if args.loss is not None else [int(x) for x in baselines.get(input_filename, {})]
+        for error_rate in rates:
+            if args.replay and not os.path.exists(trace_file(input_filename, error_rate, False)):
+                print(f"{input_filename:<12}{error_rate:>6}  no recorded trace, skipped")
+                continue
+            baseline = baselines.get(input_filename, {}).get(str(error_rate), {})
+            timeout = run_timeout(baseline, args.timeout, args.timescale)
+            try:
+                result = run_individual_file(input_filename, error_rate, args.replay, args.seed, args.timescale, timeout)
+            except subprocess.TimeoutExpired:
+                failed = True
+                print(f"{input_filename:<12}{error_rate:>6}  timed out after {round(timeout, 1)} s")
+                continue
+            except subprocess.CalledProcessError as e:
+                failed = True
+                print(f"{input_filename:<12}{error_rate:>6}  network.py exited with status {e.returncode}")
+                continue
+            regressions = find_regressions(result, baseline, args.tolerance)
+            failed = failed or bool(regressions)
+            print(f"{input_filename:<12}{error_rate:>6}{result['time']:>11}{result['bytes']:>11}"
+                  f"{result['retransmissionRatio']:>8}{result['goodput']:>11}  {'; '.join(regressions) or 'ok'}")
+            if not result["correct"]:
+                continue  # never store a run that corrupted the file as a result or baseline
+            results.setdefault(input_filename, {})[str(error_rate)] = {
+                metric: result[metric] for metric in ("time", "bytes", "retransmissionRatio", "goodput")
+            }
+
+    with open(RESULTS_PATH, "w") as f:
+        json.dump(results, f, indent=2)
+    if args.update:
+        for input_filename, test_results in results.items():
+            baselines.setdefault(input_filename, {}).update(test_results)
+        with open(BASELINE_PATH, "w") as f:
+            json.dump(baselines, f, indent=2)
+        print(f"Baselines updated in {BASELINE_PATH}")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
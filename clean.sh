@@ -7,3 +7,4 @@ rm -r __pycache__
 rm logs/*
 rm *.pyc
 rm recvfiles/*
+rm -r traces
@@ -9,7 +9,7 @@ from packet import Packet
 class Client:
     """Client class"""
 
-    def __init__(self, addr, sendFile, recvFile, MSS):
+    def __init__(self, addr, sendFile, recvFile, MSS, timeScale=1):
         """Inititalize parameters"""
         self.addr = addr
         self.sendFile = sendFile
@@ -18,6 +18,7 @@ class Client:
         self.link = None
         self.linkChanges = queue.Queue()
         self.keepRunning = True
+        self.tickInterval = 0.1 * timeScale  # seconds between iterations of the main loop
         self.f = open("logs/Client-"+self.addr+"-recvd-pkts.dump", "w")
 
 
@@ -31,7 +32,7 @@ class Client:
     def runClient(self):
         """Main loop of client"""
         while self.keepRunning:
-            time.sleep(0.1)
+            time.sleep(self.tickInterval)
             try:
                 change = self.linkChanges.get_nowait()
                 if change[0] == "add":
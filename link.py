@@ -12,15 +12,18 @@ class Link:
        Handles sending and receiving packets using threadsafe queues.
     """
 
-    def __init__(self, e1, e2, cost, MSS):
-        """Create queues. e1 & e2 are addresses of the 2 endpoints of the link"""
+    def __init__(self, e1, e2, cost, MSS, timeScale=1):
+        """Create queues. e1 & e2 are addresses of the 2 endpoints of the link.
+           The latency is 'cost' seconds scaled by 'timeScale'.
+        """
         self.q12 = queue.Queue()
         self.q21 = queue.Queue()
         self.cost = cost
-        self.latency = cost
+        self.latency = cost * timeScale
         self.MSS = MSS
         self.e1 = e1
         self.e2 = e2
+        self.trace = None  # optional TraceRecorder
 
 
     def send(self, packet, src):
@@ -36,6 +39,10 @@ class Link:
         elif src == self.e2:
             packet.time = time.time()
             self.q21.put(packet)
+        else:
+            return
+        if self.trace:
+            self.trace.record("send", src, packet)
 
 
     def recv(self, dst, timeout=None):
@@ -49,6 +56,8 @@ class Link:
                 enqeueTime = self.q21.queue[0].time
                 if currTime - enqeueTime >= self.latency:
                     packet = self.q21.get_nowait()
+                    if self.trace:
+                        self.trace.record("deliver", dst, packet)
                     return packet
                 else:
                     return None
@@ -60,6 +69,8 @@ class Link:
                 enqeueTime = self.q12.queue[0].time
                 if currTime - enqeueTime >= self.latency:
                     packet = self.q12.get_nowait()
+                    if self.trace:
+                        self.trace.record("deliver", dst, packet)
                     return packet
                 else:
                     return None
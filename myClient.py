@@ -6,6 +6,7 @@ import sys
 import queue
 from client import Client
 from packet import Packet
+from reassembly import ReassemblyBuffer
 
 
 """
@@ -26,36 +27,75 @@ TENATIVE = 2
 class MyClient(Client):
     """Implement a reliable transport"""
 
-    def __init__(self, addr, sendFile, recvFile, MSS):
+    def __init__(self, addr, sendFile, recvFile, MSS, fast_open: bool = False, time_scale: float = 1, adaptive: bool = False,
+                 fast_open_window: int = 1, min_segment: int = None):
         """Client A is sending bytes from file 'sendFile' to client B.
            Client B stores the received bytes from A in file 'recvFile'.
+           With 'fast_open' the first data window carries the handshake ACK
+           and the FIN is answered with a single ACK that closes the connection.
+           'fast_open_window' segments are sent with the handshake ACK.
+           'time_scale' shrinks the tick interval and retransmission timeout
+           together with the link latency.
+           With 'adaptive' the sender picks the segment size and retransmission
+           timeout from its loss and RTT estimates, and the receiver sends
+           cumulative ACKs whose frequency follows the loss it observes.
+           Segments shrink towards 'min_segment' (default MSS) as loss rises.
         """
-        Client.__init__(self, addr, sendFile, recvFile, MSS)  # initialize superclass
+        Client.__init__(self, addr, sendFile, recvFile, MSS, time_scale)  # initialize superclass
         self.connSetup = 0
         self.connEstablished = 0
         self.connTerminate = 0
         self.sendFile = sendFile
         self.recvFile = recvFile
 
-        self.send_timeout: float = 5
+        self.send_timeout: float = 5 * time_scale
+        self.fast_open: bool = fast_open
+        # the router takes one packet per link per tick, so a burst larger than one segment
+        # cannot leave the link sooner and only queues up in front of later segments
+        self.fast_open_window: int = fast_open_window
 
         self.max_in_flight: int = 50
         self.current_in_flight: int = 0
-        self.receive_buffer: list = []
+        self.receive_buffer: ReassemblyBuffer = ReassemblyBuffer()
         self.send_buffer: list = []
         self.timeout_buffer: list = []
         self.success: list[bool] = []
+        self.acked_count: int = 0
+        self.cumulative_acked: int = 0
+        self.transmissions: list[int] = []
+        self.send_data: str = ""
+        self.send_offset: int = 0
         self.send_queue: queue.Queue = queue.Queue()
         self.receiver_timeout: float = 0
 
+        # adaptive segment sizing and ACK frequency
+        self.adaptive: bool = adaptive
+        self.min_segment: int = min_segment or MSS  # the router drops whole packets, so shrinking only adds headers there
+        self.loss_low: float = 0.1       # full MSS and sparse ACKs at or below this loss estimate
+        self.loss_high: float = 0.5      # smallest segments and per-segment ACKs at or above this one
+        self.loss_gain: float = 0.125    # EWMA gain of the loss estimate
+        self.loss_estimate: float = 0
+        self.max_ack_every: int = 4
+        self.ack_delay: float = 2 * self.tickInterval
+        self.max_send_timeout: float = self.send_timeout
+        self.rto_margin: float = self.ack_delay + 2 * self.tickInterval  # delayed ACKs and tick jitter
+        self.srtt: float = 0
+        self.rttvar: float = 0
+        self.unacked_in_order: int = 0
+        self.ack_pending_since: float = 0
+        self.last_recvd_seq: int = 0
+
         """add your own class fields and initialization code here"""
 
 
     def sender_receive(self, packet: Packet):
         if packet.synFlag == 1 and packet.ackFlag == 1:  # received a SYN-ACK packet
-            packet = Packet("A", "B", 1, 1, 0, 1, 0, None)  # create an ACK packet
-            if self.link:
-                self.link.send(packet, self.addr)  # send ACK packet out into the network
+            if self.fast_open:
+                self.sender_send_window()  # the first data packet doubles as the ACK
+            else:
+                packet = Packet("A", "B", 1, 1, 0, 1, 0, None)  # create an ACK packet
+                if self.link:
+                    self.link.send(packet, self.addr)  # send ACK packet out into the network
             self.connEstablished = 1
 
         elif packet.finFlag == 1 and packet.ackFlag == 1:  # received a FIN-ACK packet
@@ -63,8 +103,20 @@ class MyClient(Client):
             if self.link:
                 self.link.send(packet, self.addr)  # send ACK packet out into the network
 
+        elif self.fast_open and self.connTerminate == 1 and packet.ackFlag == 1 and packet.ackNum == 1:
+            pass  # received the ACK for FIN; adaptive data ACKs can also carry ackNum 1, so only fast open uses this
+
         elif packet.ackFlag == 1:
-            self.success[packet.seqNum] = True
+            # Karn: only sample segments sent once and not waiting in send_queue for a retransmission (-1)
+            if self.adaptive and not self.success[packet.seqNum] and self.transmissions[packet.seqNum] == 1 \
+                    and self.timeout_buffer[packet.seqNum] > 0:
+                self.update_rtt(time.time() - self.timeout_buffer[packet.seqNum])
+            self.sender_ack(packet.seqNum)
+            while self.cumulative_acked < packet.ackNum:  # cumulative ACK from an adaptive receiver
+                self.sender_ack(self.cumulative_acked)
+                self.cumulative_acked += 1
+            if self.fast_open and self.connTerminate == 0 and self.sender_done():
+                self.sender_send_fin()  # close as soon as the last ACK arrives instead of on the next tick
 
 
     def receiver_receive(self, packet: Packet):
@@ -75,24 +127,37 @@ class MyClient(Client):
             self.connSetup = 1
 
         elif packet.finFlag == 1:  # received a FIN packet
-            packet = Packet("B", "A", 0, 0, 0, 1, 1, None)  # create a FIN-ACK packet
+            if self.fast_open:
+                packet = Packet("B", "A", 0, 1, 0, 1, 0, None)  # create an ACK packet that also ends the teardown
+            else:
+                packet = Packet("B", "A", 0, 0, 0, 1, 1, None)  # create a FIN-ACK packet
             if self.link:
-                self.link.send(packet, self.addr)  # send FIN-ACK packet out into the network
+                self.link.send(packet, self.addr)  # send reply packet out into the network
             self.connTerminate = 1
-            for content in self.receive_buffer:
-                self.recvFile.write(content)
 
-        elif self.connSetup == 1 and packet.ackFlag == 1:  # received an ACK packet for SYN-ACK
+        elif self.connSetup == 1 and packet.ackFlag == 1 and packet.payload is None:  # received an ACK packet for SYN-ACK
             self.connSetup = 0
 
         elif self.connTerminate == 1 and packet.ackFlag == 1:  # received an ACK packet for FIN-ACK
             self.connTerminate = 0
 
-        elif packet.ackFlag == 1 and self.connSetup == 0 and self.connTerminate == 0:  # received a data packet
-            if packet.seqNum > len(self.receive_buffer) - 1:
-                self.receive_buffer += ["" for x in range(packet.seqNum - len(self.receive_buffer) + 1)]
-            self.receive_buffer[packet.seqNum] = packet.payload
-            self.send_queue.put(Packet("B", "A", packet.seqNum, 0, 0, 1, 0, None), self.addr)
+        elif packet.ackFlag == 1 and self.connTerminate == 0:  # received a data packet
+            self.connSetup = 0  # with fast open the first data packet also acknowledges the SYN-ACK
+            in_order = packet.seqNum == self.receive_buffer.next_seq
+            for content in self.receive_buffer.insert(packet.seqNum, packet.payload):
+                self.recvFile.write(content)
+            if not self.adaptive:
+                self.send_queue.put(Packet("B", "A", packet.seqNum, 0, 0, 1, 0, None), self.addr)
+                return
+            # out-of-order and duplicate segments hint at loss and are acknowledged right away,
+            # in-order segments are acknowledged cumulatively every ack_every() segments
+            self.update_loss(0 if in_order else 1)
+            self.last_recvd_seq = packet.seqNum
+            self.unacked_in_order += 1
+            if not in_order or self.unacked_in_order >= self.ack_every():
+                self.receiver_queue_ack()
+            elif self.unacked_in_order == 1:
+                self.ack_pending_since = time.time()
 
 
     def handleRecvdPackets(self):
@@ -114,19 +179,78 @@ class MyClient(Client):
                 if self.addr == "B":
                     self.receiver_receive(packet)
 
+    def update_loss(self, lost: int):
+        self.loss_estimate += self.loss_gain * (lost - self.loss_estimate)
+
+    def update_rtt(self, sample: float):
+        if self.srtt == 0:
+            self.srtt = sample
+            self.rttvar = sample / 2
+        else:
+            self.rttvar = 0.75 * self.rttvar + 0.25 * abs(self.srtt - sample)
+            self.srtt = 0.875 * self.srtt + 0.125 * sample
+        self.send_timeout = min(self.max_send_timeout, self.srtt + max(self.rto_margin, 4 * self.rttvar))
+
+    def loss_fraction(self) -> float:
+        """Position of the loss estimate between loss_low (0) and loss_high (1)"""
+        return min(1, max(0, (self.loss_estimate - self.loss_low) / (self.loss_high - self.loss_low)))
+
+    def segment_size(self) -> int:
+        if not self.adaptive:
+            return self.MSS
+        return round(self.MSS - self.loss_fraction() * (self.MSS - self.min_segment))
+
+    def ack_every(self) -> int:
+        return max(1, round(self.max_ack_every - self.loss_fraction() * (self.max_ack_every - 1)))
+
     def sender_unpack_content(self):
-        content = self.sendFile.read(self.MSS)
-        while content:
-            self.send_buffer.append(content)
-            self.success.append(False)
-            self.timeout_buffer.append(0)
-            content = self.sendFile.read(self.MSS)
+        self.send_data = self.sendFile.read()
+        if not self.adaptive:  # cut every segment up front, adaptive mode cuts them as they are sent
+            while self.sender_next_segment():
+                pass
+
+    def sender_next_segment(self) -> bool:
+        """Cut the next segment off the unsent data, sized by the current loss estimate"""
+        if self.send_offset >= len(self.send_data):
+            return False
+        content = self.send_data[self.send_offset:self.send_offset + self.segment_size()]
+        self.send_offset += len(content)
+        self.send_buffer.append(content)
+        self.success.append(False)
+        self.timeout_buffer.append(0)
+        self.transmissions.append(0)
+        return True
+
+    def sender_ack(self, seq_num: int):
+        if not self.success[seq_num]:
+            self.success[seq_num] = True
+            self.acked_count += 1
+            if self.adaptive and self.transmissions[seq_num] == 1:
+                self.update_loss(0)
+
+    def sender_done(self) -> bool:
+        return self.acked_count == len(self.success) and self.send_offset >= len(self.send_data)
 
     def sender_send_content(self, packet: Packet):
         if self.link:
             self.link.send(packet, self.addr)  # send packet out into the network
             self.current_in_flight += 1
 
+    def sender_send_window(self):
+        while len(self.send_buffer) < self.fast_open_window and self.sender_next_segment():
+            pass
+        for seq_num, content in enumerate(self.send_buffer[:self.fast_open_window]):
+            # the link drains one packet per tick, so time each segment from when it leaves the queue
+            self.timeout_buffer[seq_num] = time.time() + seq_num * self.tickInterval
+            self.transmissions[seq_num] += 1
+            self.sender_send_content(Packet("A", "B", seq_num, 0, 0, 1, 0, content))
+
+    def sender_send_fin(self):
+        packet = Packet("A", "B", 0, 0, 0, 1, 1, None)  # create a FIN packet
+        if self.link:
+            self.link.send(packet, self.addr)  # send FIN packet out into the network
+        self.connTerminate = 1
+
     def sender_send(self):
         if self.connSetup == 0:
             self.sender_unpack_content()
@@ -136,26 +260,35 @@ class MyClient(Client):
             self.connSetup = 1
 
         if self.connEstablished == 1 and self.connTerminate == 0:
-            if all(self.success):
-                packet = Packet("A", "B", 0, 0, 0, 1, 1, None)  # create a FIN packet
-                if self.link:
-                    self.link.send(packet, self.addr)  # send FIN packet out into the network
-                self.connTerminate = 1
+            if self.sender_done():
+                self.sender_send_fin()
                 return
             for seq_num, content in enumerate(self.send_buffer):
                 if not self.success[seq_num] and self.timeout_buffer[seq_num] != -1:
                     if self.timeout_buffer[seq_num] == 0 or time.time() - self.timeout_buffer[seq_num] > self.send_timeout:
+                        if self.adaptive and self.timeout_buffer[seq_num] != 0:
+                            self.update_loss(1)
                         self.send_queue.put(Packet("A", "B", seq_num, 0, 0, 1, 0, content))
                         self.timeout_buffer[seq_num] = -1
+            if self.send_queue.empty() and self.sender_next_segment():  # retransmissions go before new data
+                self.send_queue.put(Packet("A", "B", len(self.send_buffer) - 1, 0, 0, 1, 0, self.send_buffer[-1]))
             try:
                 packet = self.send_queue.get(block=False)
                 self.timeout_buffer[packet.seqNum] = time.time()
+                self.transmissions[packet.seqNum] += 1
                 self.current_in_flight += 1
                 self.sender_send_content(packet)
             except:
                 pass
 
+    def receiver_queue_ack(self):
+        """Queue a cumulative ACK for everything delivered in order so far"""
+        self.send_queue.put(Packet("B", "A", self.last_recvd_seq, self.receive_buffer.next_seq, 0, 1, 0, None))
+        self.unacked_in_order = 0
+
     def receiver_send(self):
+        if self.unacked_in_order > 0 and time.time() - self.ack_pending_since >= self.ack_delay:
+            self.receiver_queue_ack()  # delayed ACK timer expired
         try:
             packet = self.send_queue.get(block=False)
             if self.link and packet is not None:
@@ -2,6 +2,7 @@
 # Do not share, distribute, or post online.
 
 import sys
+import argparse
 import threading
 import json
 import signal
@@ -9,51 +10,78 @@ import time
 import os.path
 import queue
 import filecmp
+import random
 from collections import defaultdict
 from client import Client
 from myClient import MyClient
 from link import Link
 from router import Router
+from tracing import TraceRecorder, DropSchedule, load_trace, summarize
+from profiling import SimulationProfiler
 
 class Network:
     """Network class maintains all clients, routers, links, and confgurations"""
 
-    def __init__(self, netJsonFilepath, sendFile, recvFile, lossProb):
-        """Create a new network from the parameters in the 'netJsonFilepath' file"""
+    def __init__(self, netJsonFilepath, sendFile, recvFile, lossProb, tracePath=None, replayPath=None, seed=None, timeScale=None, profile=False):
+        """Create a new network from the parameters in the 'netJsonFilepath' file.
+           'timeScale' (or "timeScale" in the JSON file) shrinks link latency and
+           all timers by the same factor; reported times stay in nominal seconds.
+           If 'profile' is set, the router and client threads are profiled and
+           the results are written to the logs/ directory.
+           If 'tracePath' is given, every packet event is recorded there.
+           If 'replayPath' is given, the router replays the loss decisions recorded in that trace.
+        """
         self.threads = []
+        self.profiler = SimulationProfiler() if profile else None
+        if seed != None:
+            random.seed(seed)
 
         # parse configuration details
         netJsonFile = open(netJsonFilepath, 'r')
         netJson = json.load(netJsonFile)
         self.sendFile = sendFile
         self.recvFile = recvFile
+        self.timeScale = timeScale if timeScale != None else netJson.get("timeScale", 1)
+        assert(self.timeScale > 0)
 
         # parse and create routers, clients, and links
         self.routers = self.parserouters(netJson["routers"], lossProb)
-        self.clients = self.parseClients(netJson["clients"], netJson["MSS"])
+        self.clients = self.parseClients(netJson["clients"], netJson["MSS"], netJson.get("fastOpen", False), netJson.get("adaptive", False),
+                                         netJson.get("fastOpenWindow", 1), netJson.get("minSegment"))
         self.links = self.parseLinks(netJson["links"], netJson["MSS"])
 
         netJsonFile.close()
 
+        # attach packet tracing and loss replay
+        self.trace = TraceRecorder(tracePath, self.timeScale) if tracePath else None
+        for router in self.routers.values():
+            router.trace = self.trace
+            if replayPath:
+                router.dropSchedule = DropSchedule(load_trace(replayPath), lossProb, seed or 0)
+        for p1, p2, c, link in self.links.values():
+            link.trace = self.trace
+
 
     def parserouters(self, routerParams, lossProb):
         """Parse routers from 'routerParams' dict"""
         routers = {}
         for addr in routerParams:
             assert(addr == "1")
-            routers[addr] = Router(addr, lossProb)
+            routers[addr] = Router(addr, lossProb, self.timeScale)
         return routers
 
 
-    def parseClients(self, clientParams, MSS):
+    def parseClients(self, clientParams, MSS, fastOpen, adaptive, fastOpenWindow, minSegment):
         """Parse clients from 'clientParams' dict"""
         clients = {}
         for addr in clientParams:
             assert(addr == "A" or addr == "B")
             if addr == "A":
-                clients[addr] = MyClient(addr, self.sendFile, None, MSS)
+                clients[addr] = MyClient(addr, self.sendFile, None, MSS, fastOpen, self.timeScale, adaptive,
+                                         fast_open_window=fastOpenWindow, min_segment=minSegment)
             elif addr == "B":
-                clients[addr] = MyClient(addr, None, self.recvFile, MSS)
+                clients[addr] = MyClient(addr, None, self.recvFile, MSS, fastOpen, self.timeScale, adaptive,
+                                         fast_open_window=fastOpenWindow, min_segment=minSegment)
         return clients
 
 
@@ -61,7 +89,7 @@ class Network:
         """Parse links from 'linkParams' dict"""
         links = {}
         for addr1, addr2, p1, p2, c in linkParams:
-            link = Link(addr1, addr2, c, MSS)
+            link = Link(addr1, addr2, c, MSS, self.timeScale)
             links[(addr1,addr2)] = (p1, p2, c, link)
         return links
 
@@ -79,23 +107,37 @@ class Network:
            Start thread to track link changes.
            Wait until end time and then print the final output.
         """
+        # queue the links before any thread starts so a client's first tick already has its link
+        self.addLinks()
         start = time.time()
+        if self.trace:
+            self.trace.start = start
+        if self.profiler:
+            self.profiler.start()
         for router in self.routers.values():
-            thread = router_thread(router)
+            thread = router_thread(router, self.profiler)
             thread.start()
             self.threads.append(thread)
         for client in self.clients.values():
-            thread = client_thread(client)
+            thread = client_thread(client, self.profiler)
             thread.start()
             self.threads.append(thread)
-        self.addLinks()
         signal.signal(signal.SIGINT, self.handleInterrupt)
         while True:
             if self.routers["1"].endSimulation == 1:
                 self.joinAll()
                 end = time.time()
                 print("\nTotal bytes sent = " + str(self.routers["1"].recvdByteCnt) + " bytes (" + str(self.routers["1"].recvdPktCnt) + " pkts)")
-                print("Total time of transfer = " + str(round(end-start, 3)) + " seconds")
+                print("Total time of transfer = " + str(round((end-start) / self.timeScale, 3)) + " seconds")
+                self.printEfficiency(self.routers["1"])
+                if self.trace:
+                    self.trace.close()
+                    metrics = summarize(load_trace(self.trace.f.name))
+                    print("Retransmission ratio = " + str(metrics["retransmissionRatio"]))
+                    print("Goodput = " + str(metrics["goodput"]) + " bytes/second")
+                if self.profiler:
+                    self.profiler.write("logs")
+                    print("Profile written to logs/profile-hooks.txt and logs/profile.collapsed")
                 self.sendFile.close()
                 self.recvFile.close()
                 time.sleep(1)
@@ -106,7 +148,16 @@ class Network:
                     print("FAILURE: Sent and received files do not match!")
                 return
             else:
-                time.sleep(5)
+                time.sleep(0.1 * self.timeScale)  # check every tick so the reported time is not rounded up
+
+
+    def printEfficiency(self, router):
+        """Break the router's byte count down into payload, header and retransmitted bytes"""
+        print("Payload bytes = " + str(router.recvdPayloadByteCnt) + " (" + str(router.uniquePayloadByteCnt) + " unique)")
+        print("Header bytes = " + str(router.recvdHeaderByteCnt) + " (" + str(router.recvdAckByteCnt) + " in ACKs)")
+        print("Retransmitted bytes = " + str(router.retransmittedByteCnt))
+        if router.recvdByteCnt > 0:
+            print("Efficiency = " + str(round(100 * router.uniquePayloadByteCnt / router.recvdByteCnt, 2)) + "% of bytes sent are unique payload")
 
 
     def addLinks(self):
@@ -135,19 +186,26 @@ class Network:
 
 def main():
     """Main function parses command line arguments and runs the network"""
-    if len(sys.argv) < 4:
-        sys.stdout.write("Usage: python network.py [networkSimulationFile.json] [send file path] [recv file path] [loss probability]")
+    if len(sys.argv) < 5:
+        sys.stdout.write("Usage: python network.py [networkSimulationFile.json] [send file path] [recv file path] [loss probability] [--trace trace path] [--replay trace path] [--seed seed] [--timescale factor] [--profile]")
         return
     netCfgFilepath = sys.argv[1]
     f1 = sys.argv[2]
     f2 = sys.argv[3]
     lossProb = int(sys.argv[4])
+    parser = argparse.ArgumentParser(prog="network.py", allow_abbrev=False)
+    parser.add_argument("--trace", help="record every packet event to this file")
+    parser.add_argument("--replay", help="replay the loss decisions recorded in this trace")
+    parser.add_argument("--seed", type=int, help="seed for the router's loss decisions")
+    parser.add_argument("--timescale", type=float, help="run this factor faster than real time, e.g. 0.1")
+    parser.add_argument("--profile", action="store_true", help="profile the router and client threads")
+    options = parser.parse_args(sys.argv[5:])
     if lossProb < 0 or lossProb > 99:
         print("Error: Invalid loss probability value provided!")
         return
     sendFile = open(f1, 'r')
     recvFile = open(f2, 'w')
-    net = Network(netCfgFilepath, sendFile, recvFile, lossProb)
+    net = Network(netCfgFilepath, sendFile, recvFile, lossProb, options.trace, options.replay, options.seed, options.timescale, options.profile)
     net.run(f1, f2)
     return
 
@@ -155,12 +213,16 @@ def main():
 
 class router_thread(threading.Thread):
 
-    def __init__(self, router):
+    def __init__(self, router, profiler=None):
         threading.Thread.__init__(self)
         self.router = router
+        self.profiler = profiler
 
     def run(self):
-        self.router.runRouter()
+        if self.profiler:
+            self.profiler.run("Router-" + self.router.addr, self.router.runRouter)
+        else:
+            self.router.runRouter()
 
     def join(self, timeout=None):
         self.router.keepRunning = False
@@ -168,12 +230,16 @@ class router_thread(threading.Thread):
 
 class client_thread(threading.Thread):
 
-    def __init__(self, client):
+    def __init__(self, client, profiler=None):
         threading.Thread.__init__(self)
         self.client = client
+        self.profiler = profiler
 
     def run(self):
-        self.client.runClient()
+        if self.profiler:
+            self.profiler.run("Client-" + self.client.addr, self.client.runClient)
+        else:
+            self.client.runClient()
 
     def join(self, timeout=None):
         self.client.keepRunning = False
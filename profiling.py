@@ -0,0 +1,110 @@
+# The code is subject to Purdue University copyright policies.
+# Do not share, distribute, or post online.
+
+import cProfile
+import os
+import pstats
+import sys
+import threading
+import time
+from collections import defaultdict
+
+# functions whose call counts and cumulative time are reported per thread
+HOOKS = {
+    "runRouter", "handlePacket", "logRecvdPacket",
+    "runClient", "handleRecvdPackets", "sendPackets",
+    "sender_send", "sender_receive", "receiver_send", "receiver_receive",
+    "send", "recv",
+}
+
+
+class SimulationProfiler:
+    """Opt-in profiler for the router and client threads.
+
+       Each thread runs its main loop under its own cProfile profiler, and a
+       background thread samples the stacks of all profiled threads every
+       'interval' seconds to build a collapsed-stack file for flame graphs.
+       Stacks start at the thread's main loop, and samples taken while the
+       loop itself is the innermost frame (sleeping between ticks) are left
+       out, so the flame graph shows where the busy time goes.
+    """
+
+    def __init__(self, interval: float = 0.005):
+        self.interval = interval
+        self.profiles: dict[str, cProfile.Profile] = {}
+        self.threads: dict[int, tuple] = {}      # thread ident -> (thread name, code of its main loop)
+        self.samples: dict[str, int] = defaultdict(int)
+        self.lock = threading.Lock()
+        self.keep_running = True
+        self.sampler = threading.Thread(target=self.sample, daemon=True)
+
+
+    def start(self):
+        self.sampler.start()
+
+
+    def run(self, name: str, target):
+        """Run 'target' in the calling thread under a cProfile profiler labelled 'name'"""
+        profile = cProfile.Profile()
+        with self.lock:
+            self.profiles[name] = profile
+            self.threads[threading.get_ident()] = (name, target.__code__)
+        try:
+            profile.runcall(target)
+        finally:
+            with self.lock:
+                del self.threads[threading.get_ident()]
+
+
+    def sample(self):
+        """Periodically record the current stack of every profiled thread"""
+        while self.keep_running:
+            time.sleep(self.interval)
+            frames = sys._current_frames()
+            with self.lock:
+                threads = list(self.threads.items())
+            for ident, (name, root) in threads:
+                frame = frames.get(ident)
+                if frame is None or frame.f_code is root:
+                    continue  # idle between ticks
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(code.co_name + " (" + os.path.basename(code.co_filename) + ")")
+                    if code is root:
+                        break  # leave out the threading and cProfile frames below the main loop
+                    frame = frame.f_back
+                stack.append(name)
+                self.samples[";".join(reversed(stack))] += 1
+
+
+    def stop(self):
+        self.keep_running = False
+        if self.sampler.is_alive():
+            self.sampler.join()
+
+
+    def hook_stats(self) -> list[tuple[str, str, int, float]]:
+        """Return (thread, hook, calls, cumulative seconds) for every profiled hook"""
+        rows = []
+        for name, profile in self.profiles.items():
+            stats = pstats.Stats(profile).stats
+            for (filename, line, funcname), (cc, nc, tt, ct, callers) in stats.items():
+                if funcname in HOOKS:
+                    hook = os.path.basename(filename) + ":" + funcname
+                    rows.append((name, hook, nc, ct))
+        return sorted(rows, key=lambda row: (row[0], -row[3]))
+
+
+    def write(self, log_dir: str):
+        """Write per-thread pstats dumps, the hook summary and the collapsed stacks to 'log_dir'"""
+        self.stop()
+        for name, profile in self.profiles.items():
+            profile.dump_stats(os.path.join(log_dir, name + ".prof"))
+        with open(os.path.join(log_dir, "profile-hooks.txt"), "w") as f:
+            f.write("%-12s %-36s %10s %12s\n" % ("thread", "hook", "calls", "cumtime (s)"))
+            for name, hook, calls, cumtime in self.hook_stats():
+                f.write("%-12s %-36s %10d %12.4f\n" % (name, hook, calls, cumtime))
+        with open(os.path.join(log_dir, "profile.collapsed"), "w") as f:
+            for stack, count in sorted(self.samples.items()):
+                f.write(stack + " " + str(count) + "\n")
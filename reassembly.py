@@ -0,0 +1,87 @@
+# The code is subject to Purdue University copyright policies.
+# Do not share, distribute, or post online.
+
+import bisect
+
+
+class ReassemblyBuffer:
+    """Receive-side reassembly of segments indexed by sequence number.
+
+       Segments below 'next_seq' have already been delivered in order.
+       Out-of-order segments are held in 'pending' and their sequence
+       numbers are tracked as a sorted list of disjoint half-open
+       intervals [start, end), which gives the missing ranges directly.
+    """
+
+    def __init__(self):
+        self.next_seq: int = 0                  # first sequence number not yet delivered
+        self.pending: dict[int, str] = {}       # out-of-order segments, indexed by sequence number
+        self.starts: list[int] = []             # sorted interval starts of pending segments
+        self.ends: list[int] = []               # matching (exclusive) interval ends
+
+
+    def insert(self, seq_num: int, payload: str) -> list[str]:
+        """Store a received segment.
+           Returns the payloads that became contiguous with the already
+           delivered prefix, in order, so the caller can write them out.
+           Duplicates return an empty list.
+        """
+        if self.is_duplicate(seq_num):
+            return []
+        if seq_num == self.next_seq:
+            self.next_seq += 1
+            delivered = [payload]
+            if self.starts and self.starts[0] == self.next_seq:
+                end = self.ends[0]
+                del self.starts[0]
+                del self.ends[0]
+                for seq in range(self.next_seq, end):
+                    delivered.append(self.pending.pop(seq))
+                self.next_seq = end
+            return delivered
+        self.pending[seq_num] = payload
+        self.add_interval(seq_num)
+        return []
+
+
+    def is_duplicate(self, seq_num: int) -> bool:
+        """Check whether segment 'seq_num' has already been received"""
+        return seq_num < self.next_seq or seq_num in self.pending
+
+
+    def add_interval(self, seq_num: int):
+        """Add 'seq_num' to the interval index, merging with its neighbours"""
+        i = bisect.bisect_right(self.starts, seq_num)
+        joins_left = i > 0 and self.ends[i - 1] == seq_num
+        joins_right = i < len(self.starts) and self.starts[i] == seq_num + 1
+        if joins_left and joins_right:
+            self.ends[i - 1] = self.ends[i]
+            del self.starts[i]
+            del self.ends[i]
+        elif joins_left:
+            self.ends[i - 1] = seq_num + 1
+        elif joins_right:
+            self.starts[i] = seq_num
+        else:
+            self.starts.insert(i, seq_num)
+            self.ends.insert(i, seq_num + 1)
+
+
+    def missing_ranges(self) -> list[tuple[int, int]]:
+        """Return the gaps below the highest received segment as [start, end) pairs"""
+        missing = []
+        prev = self.next_seq
+        for start, end in zip(self.starts, self.ends):
+            missing.append((prev, start))
+            prev = end
+        return missing
+
+
+    def sack_blocks(self, max_blocks: int = 3) -> list[tuple[int, int]]:
+        """Return up to 'max_blocks' received out-of-order ranges as [start, end) pairs"""
+        return list(zip(self.starts, self.ends))[:max_blocks]
+
+
+    def complete(self) -> bool:
+        """Check whether every received segment has been delivered in order"""
+        return not self.pending
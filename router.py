@@ -8,16 +8,19 @@ import queue
 import random
 from link import Link
 
+HEADER_BYTES = 10  # bytes charged for every packet header
+
 class Router():
     """Router class"""
 
-    def __init__(self, addr, lossProb):
+    def __init__(self, addr, lossProb, timeScale=1):
         """Initialize Router address and threadsafe queue for link changes"""
         self.addr = addr       # address of router
         self.links = {}        # links indexed by port, i.e., {port:link, ......, port:link}
         self.linkChanges = queue.Queue()
         self.lossProb = lossProb
         self.keepRunning = True
+        self.tickInterval = 0.1 * timeScale  # seconds between iterations of the main loop
         self.endSimulation = 0
         self.connSetup = 0
         self.connEstablished = 0
@@ -25,6 +28,14 @@ class Router():
         self.f = open("logs/Router-"+self.addr+"-recvd-pkts.dump", "w")
         self.recvdPktCnt = 0
         self.recvdByteCnt = 0
+        self.recvdPayloadByteCnt = 0      # payload bytes, including retransmitted payload
+        self.uniquePayloadByteCnt = 0     # payload bytes of first transmissions only
+        self.recvdHeaderByteCnt = 0       # header bytes of all packets
+        self.recvdAckByteCnt = 0          # header bytes of pure ACK packets
+        self.retransmittedByteCnt = 0     # header and payload bytes of repeated data packets
+        self.seenDataPkts = set()         # (srcAddr, seqNum) of data packets already received
+        self.trace = None         # optional TraceRecorder
+        self.dropSchedule = None  # optional DropSchedule replaying recorded loss decisions
 
 
     def changeLink(self, change):
@@ -57,7 +68,7 @@ class Router():
     def runRouter(self):
         """Main loop of router"""
         while self.keepRunning:
-            time.sleep(0.1)
+            time.sleep(self.tickInterval)
             try:
                 change = self.linkChanges.get_nowait()
                 if change[0] == "add":
@@ -80,13 +91,25 @@ class Router():
             pass
 
 
-    def logRecvdPacket(self, port, outPort, packet, dropped):
+    def logRecvdPacket(self, port, outPort, packet, dropped, lost=False):
         """Log recvd packets"""
+        if self.trace:
+            self.trace.record("drop" if dropped else "forward", self.addr, packet, port=port, lost=lost)
+
         self.recvdPktCnt += 1
+        self.recvdHeaderByteCnt += HEADER_BYTES
         if packet.payload != None:
-            self.recvdByteCnt += 10 + len(packet.payload) # 10 bytes for header
+            self.recvdByteCnt += HEADER_BYTES + len(packet.payload)
+            self.recvdPayloadByteCnt += len(packet.payload)
+            if (packet.srcAddr, packet.seqNum) in self.seenDataPkts:
+                self.retransmittedByteCnt += HEADER_BYTES + len(packet.payload)
+            else:
+                self.seenDataPkts.add((packet.srcAddr, packet.seqNum))
+                self.uniquePayloadByteCnt += len(packet.payload)
         else:
-            self.recvdByteCnt += 10 # 10 bytes for header
+            self.recvdByteCnt += HEADER_BYTES
+            if packet.synFlag == 0 and packet.finFlag == 0:
+                self.recvdAckByteCnt += HEADER_BYTES
 
         if dropped == 0:
             self.f.write("Packet " + str(self.recvdPktCnt) + " - " + "srcAddr: " + packet.srcAddr + " dstAddr: " + packet.dstAddr + " seqNum: " + str(packet.seqNum) + " ackNum: " + str(packet.ackNum) + " SYNFLag: " + str(packet.synFlag) + " ACKFlag: " + str(packet.ackFlag) + " FINFlag: " + str(packet.finFlag) + " Received on port: " + str(port) + " Forwarded on port: " + str(outPort) + " Payload: " + str(packet.payload))
@@ -109,9 +132,16 @@ class Router():
         if packet.synFlag == 1 or packet.finFlag == 1: # control packet
             assert(packet.payload == None)
 
-        # drop all data packets if connection is not established
-        if self.connEstablished == 0 and packet.payload != None:
-            self.logRecvdPacket(port, None, packet, 1)
+        # decide loss up front so every arrival gets a decision that a replay can reproduce
+        if self.dropSchedule:
+            lost = self.dropSchedule.lost(packet)
+        else:
+            lost = random.randint(0, 99) < self.lossProb
+
+        # drop all data packets if connection is not established,
+        # unless the data packet also carries the ACK that completes the handshake
+        if self.connEstablished == 0 and packet.payload != None and not (self.connSetup == 1 and packet.ackFlag == 1):
+            self.logRecvdPacket(port, None, packet, 1, lost)
             if port == 1:
                 print("[+] ", end='', flush=True)
             elif port == 2:
@@ -125,19 +155,18 @@ class Router():
             self.connTerminate = 1
 
         # forwarding and drop logic
-        r = random.randint(0, 99)
-        if r < self.lossProb and self.connSetup == 0 and self.connTerminate == 0: # drop
-            self.logRecvdPacket(port, None, packet, 1)
+        if lost and self.connSetup == 0 and self.connTerminate == 0: # drop
+            self.logRecvdPacket(port, None, packet, 1, lost)
             if port == 1:
                 print("[+] ", end='', flush=True)
             elif port == 2:
                 print("[@] ", end='', flush=True)
         else: # forward
             if port == 1:
-                self.logRecvdPacket(port, 2, packet, 0)
+                self.logRecvdPacket(port, 2, packet, 0, lost)
                 self.send(2, packet)
             elif port == 2:
-                self.logRecvdPacket(port, 1, packet, 0)
+                self.logRecvdPacket(port, 1, packet, 0, lost)
                 self.send(1, packet)
             if port == 1:
                 print("+ ", end='', flush=True)
@@ -9,12 +9,13 @@ from collections.abc import Callable
 from pathlib import Path
 from pydantic import BaseModel
 
-BASELINE_PATH = Path("/home/malinkyzubr/Desktop/ECE463/463lab4/baselines.json")
-INPUT_PATH = Path("/home/malinkyzubr/Desktop/ECE463/463lab4/sendfiles")
-OUTPUT_PATH = Path("/home/malinkyzubr/Desktop/ECE463/463lab4/recvfiles")
-LOG_PATH = Path("/home/malinkyzubr/Desktop/ECE463/463lab4/logs")
-NETWORK_PY = Path("/home/malinkyzubr/Desktop/ECE463/463lab4/network.py")
-JSON_FILE = Path("/home/malinkyzubr/Desktop/ECE463/463lab4/01.json")
+ROOT = Path(__file__).resolve().parent
+BASELINE_PATH = ROOT / "baselines.json"
+INPUT_PATH = ROOT / "sendfiles"
+OUTPUT_PATH = ROOT / "recvfiles"
+LOG_PATH = ROOT / "logs"
+NETWORK_PY = ROOT / "network.py"
+JSON_FILE = ROOT / "01.json"
 
 
 class NetworkTestResults(BaseModel):
@@ -0,0 +1,68 @@
+# The code is subject to Purdue University copyright policies.
+# Do not share, distribute, or post online.
+
+import unittest
+
+from reassembly import ReassemblyBuffer
+
+
+class ReassemblyBufferTest(unittest.TestCase):
+
+    def test_in_order(self):
+        buffer = ReassemblyBuffer()
+        self.assertEqual(buffer.insert(0, "a"), ["a"])
+        self.assertEqual(buffer.insert(1, "b"), ["b"])
+        self.assertEqual(buffer.next_seq, 2)
+        self.assertTrue(buffer.complete())
+
+
+    def test_out_of_order(self):
+        buffer = ReassemblyBuffer()
+        self.assertEqual(buffer.insert(2, "c"), [])
+        self.assertEqual(buffer.insert(1, "b"), [])
+        self.assertEqual(buffer.insert(4, "e"), [])
+        self.assertFalse(buffer.complete())
+        self.assertEqual(buffer.insert(0, "a"), ["a", "b", "c"])
+        self.assertEqual(buffer.next_seq, 3)
+        self.assertEqual(buffer.insert(3, "d"), ["d", "e"])
+        self.assertTrue(buffer.complete())
+
+
+    def test_duplicates(self):
+        buffer = ReassemblyBuffer()
+        buffer.insert(0, "a")
+        buffer.insert(2, "c")
+        self.assertTrue(buffer.is_duplicate(0))
+        self.assertTrue(buffer.is_duplicate(2))
+        self.assertFalse(buffer.is_duplicate(1))
+        self.assertEqual(buffer.insert(0, "a"), [])
+        self.assertEqual(buffer.insert(2, "x"), [])
+        self.assertEqual(buffer.insert(1, "b"), ["b", "c"])
+
+
+    def test_empty_payload(self):
+        buffer = ReassemblyBuffer()
+        self.assertEqual(buffer.insert(1, ""), [])
+        self.assertEqual(buffer.insert(0, "a"), ["a", ""])
+        self.assertEqual(buffer.insert(1, ""), [])
+        self.assertTrue(buffer.complete())
+
+
+    def test_missing_ranges_and_sack_blocks(self):
+        buffer = ReassemblyBuffer()
+        self.assertEqual(buffer.missing_ranges(), [])
+        self.assertEqual(buffer.sack_blocks(), [])
+        for seq_num in (2, 3, 6, 8, 9, 11):
+            buffer.insert(seq_num, str(seq_num))
+        self.assertEqual(buffer.missing_ranges(), [(0, 2), (4, 6), (7, 8), (10, 11)])
+        self.assertEqual(buffer.sack_blocks(), [(2, 4), (6, 7), (8, 10)])
+        self.assertEqual(buffer.sack_blocks(max_blocks=5), [(2, 4), (6, 7), (8, 10), (11, 12)])
+        buffer.insert(7, "7")  # joins [6, 7) and [8, 10)
+        self.assertEqual(buffer.sack_blocks(), [(2, 4), (6, 10), (11, 12)])
+        buffer.insert(0, "0")
+        buffer.insert(1, "1")
+        self.assertEqual(buffer.missing_ranges(), [(4, 6), (10, 11)])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,137 @@
+# The code is subject to Purdue University copyright policies.
+# Do not share, distribute, or post online.
+
+import json
+import random
+import threading
+import time
+from collections import defaultdict
+from router import HEADER_BYTES
+
+SEND = "send"
+DELIVER = "deliver"
+FORWARD = "forward"
+DROP = "drop"
+
+
+def packet_key(packet) -> tuple:
+    """Identify a packet independently of when it was sent"""
+    length = len(packet.payload) if packet.payload is not None else None
+    return (packet.srcAddr, packet.dstAddr, packet.seqNum, packet.ackNum,
+            packet.synFlag, packet.ackFlag, packet.finFlag, length)
+
+
+def event_key(event: dict) -> tuple:
+    """Identify the packet of a recorded event, matching packet_key"""
+    return (event["src"], event["dst"], event["seq"], event["ackNum"],
+            event["syn"], event["ack"], event["fin"], event["len"])
+
+
+class TraceRecorder:
+    """Records packet events (send, forward, drop, deliver) from the links and
+       router as JSON lines, with timestamps relative to the start of the run.
+       Timestamps are divided by 'time_scale' so they are in nominal seconds.
+    """
+
+    def __init__(self, path: str, time_scale: float = 1):
+        self.f = open(path, "w")
+        self.lock = threading.Lock()
+        self.start: float = time.time()
+        self.time_scale: float = time_scale
+
+
+    def record(self, event: str, node: str, packet, **extra):
+        entry = {
+            "t": round((time.time() - self.start) / self.time_scale, 6),
+            "event": event,
+            "node": node,
+            "src": packet.srcAddr,
+            "dst": packet.dstAddr,
+            "seq": packet.seqNum,
+            "ackNum": packet.ackNum,
+            "syn": packet.synFlag,
+            "ack": packet.ackFlag,
+            "fin": packet.finFlag,
+            "len": len(packet.payload) if packet.payload is not None else None,
+        }
+        entry.update(extra)
+        line = json.dumps(entry)
+        with self.lock:
+            self.f.write(line + "\n")
+
+
+    def close(self):
+        with self.lock:
+            self.f.close()
+
+
+def load_trace(path: str) -> list[dict]:
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+class DropSchedule:
+    """Replays the router's loss decisions from a recorded trace.
+
+       The n-th arrival of a given packet at the router gets the same loss
+       decision it got in the recorded run, so a modified client sees the
+       same loss pattern for the same transmissions. Packets the recorded
+       run never sent fall back to a seeded random decision.
+    """
+
+    def __init__(self, events: list[dict], loss_prob: int, seed: int = 0):
+        self.loss_prob = loss_prob
+        self.random = random.Random(seed)
+        self.decisions: dict[tuple, list[bool]] = defaultdict(list)
+        self.seen: dict[tuple, int] = defaultdict(int)
+        for event in events:
+            if event["event"] in (FORWARD, DROP):
+                self.decisions[event_key(event)].append(event["lost"])
+
+
+    def lost(self, packet) -> bool:
+        """Return the loss decision for the next arrival of 'packet' at the router"""
+        key = packet_key(packet)
+        n = self.seen[key]
+        self.seen[key] += 1
+        recorded = self.decisions.get(key)
+        if recorded is not None and n < len(recorded):
+            return recorded[n]
+        return self.random.randint(0, 99) < self.loss_prob
+
+
+def summarize(events: list[dict], sender: str = "A", receiver: str = "B") -> dict:
+    """Compute transfer metrics from a recorded trace.
+       'bytes' matches the router's recvdByteCnt accounting and 'time' is the
+       timestamp of the last packet the router handled.
+    """
+    router_events = [e for e in events if e["event"] in (FORWARD, DROP)]
+    data_sends = [e for e in events if e["event"] == SEND and e["node"] == sender and e["len"] is not None]
+    delivered = {}
+    for e in events:
+        if e["event"] == DELIVER and e["node"] == receiver and e["len"] is not None:
+            delivered[e["seq"]] = e["len"]
+
+    total_bytes = sum(HEADER_BYTES + (e["len"] or 0) for e in router_events)
+    seen = set()
+    retransmitted_bytes = 0
+    for e in router_events:
+        if e["len"] is not None:
+            if (e["src"], e["seq"]) in seen:
+                retransmitted_bytes += HEADER_BYTES + e["len"]
+            seen.add((e["src"], e["seq"]))
+    duration = router_events[-1]["t"] if router_events else 0.0
+    unique_sent = len({e["seq"] for e in data_sends})
+    retransmissions = len(data_sends) - unique_sent
+    payload_bytes = sum(delivered.values())
+    return {
+        "time": round(duration, 3),
+        "bytes": total_bytes,
+        "pkts": len(router_events),
+        "drops": sum(1 for e in router_events if e["event"] == DROP),
+        "payloadBytes": sum(e["len"] or 0 for e in router_events),
+        "headerBytes": HEADER_BYTES * len(router_events),
+        "retransmittedBytes": retransmitted_bytes,
+        "retransmissionRatio": round(retransmissions / len(data_sends), 4) if data_sends else 0.0,
+        "goodput": round(payload_bytes / duration, 3) if duration > 0 else 0.0,
+    }